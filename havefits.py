@@ -1,11 +1,24 @@
 import wx
 import os
-import requests
+import re
+import itertools
+import collections
 import threading
-from urllib.parse import urlparse
-from requests.exceptions import RequestException
+import shutil
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, quote
 
-BUFFER_SIZE = 1024
+BUFFER_SIZE = 1024 * 1024
+MAX_WORKERS, MAX_WORKERS_LIMIT = 16, 64
+TIMEOUT = (5, 30)
+STATUS_INTERVAL = 100
+PART_SUFFIX = '.part'
+# Where the filesystem lacks fallocate (vfat/exFAT, NFSv3, older CIFS) glibc emulates
+# posix_fallocate by writing every block up front.  Only large files, where fragmentation
+# matters, are preallocated; on such filesystems they still pay that extra write.
+PREALLOCATE_MIN_SIZE = 32 * 1024 * 1024
+FITS_PATTERN = re.compile(r'\.fits?$', re.IGNORECASE)
 
 def is_valid_url(url):
     """
@@ -16,38 +29,108 @@ def is_valid_url(url):
     except ValueError:
         return False
 
-class DownloadThread(threading.Thread):
-    def __init__(self, url, filename, save_path, parent):
-        """
-        Initializes a DownloadThread object with the provided URL, filename, save path, and parent frame.  Use of threading.Thread object to allow the downloads to go on in the background.  Subclasses threading.Thread to define a custom run method.
-        https://docs.python.org/3.8/library/threading.html#threading.Thread
-        """
-        super().__init__()
-        self.url, self.filename, self.save_path, self.parent = url, filename, save_path, parent
+def _content_length(response):
+    """
+    Reads the Content-Length header of a response.  Return int, 0 if it is missing or malformed.
+    """
+    try:
+        return max(int(response.headers.get('Content-Length', 0)), 0)
+    except ValueError:
+        return 0
 
-    def run(self):
-        """
-        According to the docs, called automatically when a thread is started; attempts to download the file from the URL, save it to the specified path, and, given the customization, updates the GUI with progress.
-        Run for each thread, triees to get a URL response.  If not, we have an exception.  If it is 200, writes the file to a nonexistent file name.  Otherwise, report a failure to the log (GUI).
-        """
+def _remote_size(session, url):
+    """
+    Asks the server for the size of the file at the URL with a HEAD request.  The session asks for identity encoding, so the length is comparable to the bytes on disk.  Return int, 0 if unknown.
+    """
+    response = session.head(url, allow_redirects=True, timeout=TIMEOUT)
+    return _content_length(response) if response.status_code == 200 else 0
+
+def _do_download(session, url, filename, save_prefix, parent):
+    """
+    Downloads one file from the URL into the download folder on a ThreadPoolExecutor worker, using the frame's shared requests.Session.
+    https://docs.python.org/3.8/library/concurrent.futures.html#threadpoolexecutor
+    Skips a finished file the server reports at the same size, resumes a shorter partial file with a Range request, and otherwise streams the body to a partial file that is renamed to a nonexistent file name once complete.  Queues a (filename, status) row for the log and signals the frame when the last file of the batch is done.
+    """
+    from requests.exceptions import RequestException
+    from urllib3.exceptions import HTTPError as Urllib3Error
+    try:
+        file_path = save_prefix + filename
+        part_path = file_path + PART_SUFFIX
+        complete = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        partial = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        size = _remote_size(session, url) if complete or partial else 0
+        if complete and complete == size:
+            if partial:
+                os.remove(part_path)
+            parent.status_queue.append((filename, "Already downloaded"))
+            return
+        offset = partial if 0 < partial < size else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else None
+        response = session.get(url, headers=headers, stream=True, timeout=TIMEOUT)
+        if offset and response.status_code == 206 and response.headers.get('Content-Range', '').startswith(f"bytes {offset}-"):
+            file = open(part_path, 'r+b', buffering=BUFFER_SIZE)
+            file.seek(offset)
+        elif response.status_code == 200:
+            offset, file = 0, open(part_path, 'wb', buffering=BUFFER_SIZE)
+        else:
+            response.close()
+            parent.status_queue.append((filename, "Failed to download"))
+            return
+        response.raw.decode_content = True
+        with file:
+            size = _content_length(response)
+            if size >= PREALLOCATE_MIN_SIZE and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(file.fileno(), offset, size)
+                except OSError:
+                    pass
+            try:
+                shutil.copyfileobj(response.raw, file, length=BUFFER_SIZE)
+            finally:
+                file.truncate()
+        base_name, file_extension = os.path.splitext(filename)
+        for count in itertools.count(0):
+            new_path = save_prefix + (filename if count == 0 else f"{base_name} Copy {count}{file_extension}")
+            try:
+                os.close(os.open(new_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0), 0o644))
+                break
+            except FileExistsError:
+                continue
         try:
-            response = requests.get(self.url, stream=True)
-            if response.status_code == 200:
-                file_path = os.path.join(self.save_path, self.filename)
-                file_exists, count = os.path.exists(file_path), 1
-                while file_exists:
-                    base_name, file_extension = os.path.splitext(self.filename)
-                    new_filename = f"{base_name} Copy {count}{file_extension}"
-                    file_path = os.path.join(self.save_path, new_filename)
-                    file_exists, count = os.path.exists(file_path), count + 1
-                with open(file_path, 'wb') as file:
-                    for chunk in response.iter_content(BUFFER_SIZE):
-                        file.write(chunk)
-                wx.CallAfter(self.parent.update_status, f"Downloaded: {self.filename}")
-            else:
-                wx.CallAfter(self.parent.update_status, f"Failed to download: {self.filename}")
-        except RequestException as e:
-            wx.CallAfter(self.parent.update_status, f"Error: {str(e)}")
+            os.replace(part_path, new_path)
+        except OSError:
+            os.remove(new_path)
+            raise
+        parent.status_queue.append((filename, "Resumed" if offset else "Downloaded"))
+    except (RequestException, Urllib3Error, OSError) as e:
+        parent.status_queue.append((filename, f"Error: {str(e)}"))
+    except Exception as e:
+        parent.status_queue.append((filename, f"Error: {type(e).__name__}: {str(e)}"))
+    finally:
+        with parent._lock:
+            parent._remaining -= 1
+            done = parent._remaining == 0
+        if done:
+            wx.CallAfter(parent._on_batch_complete)
+
+class StatusListCtrl(wx.ListCtrl):
+    '''
+    Virtual report-mode wx.ListCtrl for the activity log.  Rows live in a plain list and wx asks for the text of only the rows on screen via OnGetItemText, so appending is O(1) no matter how long the log gets.
+    https://docs.wxpython.org/wx.ListCtrl.html#wx.ListCtrl.OnGetItemText
+    '''
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL)
+        self.InsertColumn(0, "File", width=250)
+        self.InsertColumn(1, "Status", width=300)
+        self.rows = []
+
+    def OnGetItemText(self, item, column):
+        return self.rows[item][column]
+
+    def append_rows(self, rows):
+        self.rows.extend(rows)
+        self.SetItemCount(len(self.rows))
+        self.EnsureVisible(len(self.rows) - 1)
 
 class MyFrame(wx.Frame):
     '''
@@ -56,12 +139,24 @@ class MyFrame(wx.Frame):
     def __init__(self, parent, title):
         super().__init__(parent, title=title, size=(600, 600))
         self.Bind(wx.EVT_MENU, self.on_exit, id=wx.ID_EXIT)
-        self.in_progress_downloads, self.download_path = 0, None
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self._remaining, self._lock = 0, threading.Lock()
+        self.download_path, self.batch_failed = None, False
+        self.status_queue = collections.deque()
+        self.status_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self._flush_status, self.status_timer)
+        self.max_workers = MAX_WORKERS
+        self.pool, self.futures = ThreadPoolExecutor(max_workers=self.max_workers), []
+        self.session = None
         self.panel = wx.Panel(self)
         self.base_url_label, self.base_url_text = wx.StaticText(self.panel, label="Base URL"), wx.TextCtrl(self.panel)
         self.file_list_label, self.file_list_text = wx.StaticText(self.panel, label="FITS File Names, One Per Line"), wx.TextCtrl(self.panel, style=wx.TE_MULTILINE)
         self.download_to_button, self.download_button = wx.Button(self.panel, label="Choose Download Folder"), wx.Button(self.panel, label="Start Download")
-        self.status_label, self.status_text = wx.StaticText(self.panel, label="Activity Log"), wx.TextCtrl(self.panel, style=wx.TE_MULTILINE | wx.TE_READONLY)
+        self.status_label, self.status_list = wx.StaticText(self.panel, label="Activity Log"), StatusListCtrl(self.panel)
+        self.max_workers_label, self.max_workers_spin = wx.StaticText(self.panel, label="Simultaneous Downloads"), wx.SpinCtrl(self.panel, min=1, max=MAX_WORKERS_LIMIT, initial=MAX_WORKERS)
+        max_workers_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        max_workers_sizer.Add(self.max_workers_label, 0, wx.ALL | wx.ALIGN_CENTER_VERTICAL, 10)
+        max_workers_sizer.Add(self.max_workers_spin, 0, wx.ALL, 10)
         download_location_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.selected_download_label, self.selected_download_text = wx.StaticText(self.panel, label="Selected Download Folder:"), wx.StaticText(self.panel, label="Not selected")
         download_location_sizer.Add(self.selected_download_label, 0, wx.ALL, 10)
@@ -72,16 +167,29 @@ class MyFrame(wx.Frame):
         self.sizer.AddMany([
             (self.base_url_label, 0, wx.ALL, 10), (self.base_url_text, 0, wx.EXPAND | wx.ALL, 10),
             (self.file_list_label, 0, wx.ALL, 10), (self.file_list_text, 1, wx.EXPAND | wx.ALL, 10),
-            (download_location_sizer, 0, wx.EXPAND | wx.ALL, 10),
+            (download_location_sizer, 0, wx.EXPAND | wx.ALL, 10), (max_workers_sizer, 0, wx.EXPAND | wx.ALL, 10),
             (self.download_to_button, 0, wx.ALL, 10), (self.download_button, 0, wx.ALL, 10),
-            (self.status_label, 0, wx.ALL, 10), (self.status_text, 1, wx.EXPAND | wx.ALL, 10)
+            (self.status_label, 0, wx.ALL, 10), (self.status_list, 1, wx.EXPAND | wx.ALL, 10)
         ])
         self.panel.SetSizer(self.sizer)
+        self.status_timer.Start(STATUS_INTERVAL)
         self.Show()
         
     def on_exit(self, event):
         self.Close()
 
+    def on_close(self, event):
+        """
+        Runs however the window is closed (menu, close box, Alt+F4): stops the log timer, drops queued downloads, and closes the session before letting wx destroy the frame.
+        """
+        self.status_timer.Stop()
+        for future in self.futures:
+            future.cancel()
+        self.pool.shutdown(wait=False)
+        if self.session:
+            self.session.close()
+        event.Skip()
+
     def on_download_to(self, event):
         dialog = wx.DirDialog(self, "Choose a download location", style=wx.DD_DEFAULT_STYLE)
         if dialog.ShowModal() == wx.ID_OK:
@@ -90,31 +198,65 @@ class MyFrame(wx.Frame):
             self.selected_download_text.SetLabel(self.download_path)
 
     def on_download(self, event):
-        base_url, file_list = self.base_url_text.GetValue(), self.file_list_text.GetValue().splitlines()
+        base_url = self.base_url_text.GetValue()
+        file_list = list(dict.fromkeys(line.strip() for line in self.file_list_text.GetValue().splitlines() if line.strip()))
         if not self.download_path:
             wx.MessageBox("Please select a download location.", "Error", wx.OK | wx.ICON_ERROR)
             return
         if not is_valid_url(base_url):
             wx.MessageBox("Please enter a valid Base URL.", "Error", wx.OK | wx.ICON_ERROR)
             return
-        self.in_progress_downloads, invalid_files = 0, []
+        self.batch_failed, valid_files, invalid_files = False, [], []
+        if self.max_workers != self.max_workers_spin.GetValue():
+            self.pool.shutdown(wait=False)
+            self.max_workers = self.max_workers_spin.GetValue()
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
         for filename in file_list:
-            if not filename.lower().endswith(('.fit', '.fits')):
-                invalid_files.append(filename)
-                continue
-            url = os.path.join(base_url, filename)
-            thread = DownloadThread(url, filename, self.download_path, self)
-            thread.start()
-            self.in_progress_downloads += 1
+            (valid_files if FITS_PATTERN.search(filename) else invalid_files).append(filename)
+        base_url, save_prefix, session, submit = base_url.rstrip('/') + '/', os.path.join(self.download_path, ''), self.get_session(), self.pool.submit
+        with self._lock:
+            self._remaining = len(valid_files)
+        if valid_files:
+            self.download_button.Disable()
+        self.futures = [submit(_do_download, session, base_url + quote(filename), filename, save_prefix, self) for filename in valid_files]
         if invalid_files:
             error_message = "The following files are not FITS files and will not be downloaded:\n"
             error_message += "\n".join(invalid_files)
             wx.MessageBox(error_message, "Invalid File Names", wx.OK | wx.ICON_ERROR)
 
-    def update_status(self, message):
-        current_status = self.status_text.GetValue()
-        status_message = "" if self.in_progress_downloads > 0 else "Partially Complete" if "Failed to download" in message else "All Complete, Pending Next"
-        self.status_text.SetValue(current_status + message + '\n' + f"{status_message}\n")
+    def get_session(self):
+        """
+        Creates the shared requests.Session on first use rather than in __init__, so the window can paint before requests is imported (the import is started on a background thread at launch and is usually done by the first click).
+        """
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self.session = requests.Session()
+            self.session.headers.update({'Accept-Encoding': 'identity'})
+            for prefix in ('https://', 'http://'):
+                self.session.mount(prefix, HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS_LIMIT))
+        return self.session
+
+    def _on_batch_complete(self):
+        if not self:
+            return
+        self._flush_status()
+        self.download_button.Enable()
+        self.update_status("", "Partially Complete" if self.batch_failed else "All Complete, Pending Next")
+
+    def _flush_status(self, event=None):
+        """
+        Drains every row the download workers queued since the last tick and adds them to the log in one go, instead of redrawing the log per message.
+        """
+        rows = []
+        while self.status_queue:
+            rows.append(self.status_queue.popleft())
+        if rows:
+            self.batch_failed = self.batch_failed or any(status.startswith(("Failed to download", "Error:")) for _, status in rows)
+            self.status_list.append_rows(rows)
+
+    def update_status(self, filename, status):
+        self.status_list.append_rows([(filename, status)])
 
 class MyApp(wx.App):
     '''
@@ -135,5 +277,6 @@ class MyApp(wx.App):
         return True
 
 if __name__ == "__main__":
+    threading.Thread(target=importlib.import_module, args=("requests",), daemon=True).start()
     app = MyApp(False)
     app.MainLoop()